@@ -14,6 +14,19 @@ DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 DEFAULT_GROCERY_LIST_PATH = os.path.join(DATA_DIR, 'default_grocery_list.json')
 CURRENT_GROCERY_LIST_PATH = os.path.join(DATA_DIR, 'current_grocery_list.json')
 
+# Shopping list priorities, indexed by how many thresholds the needed quantity falls below
+PRIORITIES = ("high", "medium", "low")
+
+def shopping_priority(needed_qty, max_qty):
+    """Return the shopping list priority for an item that needs needed_qty more units."""
+    if isinstance(needed_qty, int) and isinstance(max_qty, int):
+        # Integer thresholds: ceil(80%) and ceil(50%) of the weekly max
+        high_threshold = (max_qty * 8 + 9) // 10
+        medium_threshold = (max_qty + 1) // 2
+        return PRIORITIES[(needed_qty < high_threshold) + (needed_qty < medium_threshold)]
+    # Fractional quantities keep the plain float comparison
+    return "high" if needed_qty >= max_qty * 0.8 else "medium" if needed_qty >= max_qty * 0.5 else "low"
+
 def load_default_grocery_list():
     """Load the default weekly grocery list template."""
     try:
@@ -88,7 +101,7 @@ class handler(BaseHTTPRequestHandler):
                             "name": item_name,
                             "quantity": f"{needed_qty} {unit}",
                             "category": category_name,
-                            "priority": "high" if needed_qty >= max_qty * 0.8 else "medium" if needed_qty >= max_qty * 0.5 else "low"
+                            "priority": shopping_priority(needed_qty, max_qty)
                         })
                     
                     # Add to current inventory if you have any
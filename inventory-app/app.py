@@ -1,13 +1,28 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from datetime import datetime
+import asyncio
 import json
 import base64
 from io import BytesIO
 from PIL import Image
 import os
+import hashlib
 import logging
+import sqlite3
+import struct
+import subprocess
+import threading
+import uuid
+import orjson
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 import sys
 sys.path.append("/Users/megha/Documents/repos/weekly_grocery_agent/src")
@@ -32,6 +47,12 @@ CORS(app, origins=["http://localhost:3000", "https://your-frontend-domain.com"])
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
 
+# Magic bytes of uploads that can be handed to CrewAI without re-encoding
+JPEG_SOI = b'\xff\xd8\xff'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# JPEG start-of-frame markers (SOF0-SOF15, excluding DHT/JPG/DAC)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
 # Create uploads directory if it doesn't exist
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -39,10 +60,109 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Grocery list file paths
 DEFAULT_GROCERY_LIST_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'default_grocery_list.json')
 CURRENT_GROCERY_LIST_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'current_grocery_list.json')
+# Lock file serializing grocery list writes across gunicorn worker processes
+GROCERY_LIST_LOCK_PATH = CURRENT_GROCERY_LIST_PATH + '.lock'
+
+# Shopping list priorities, indexed by how many thresholds the needed quantity falls below
+PRIORITIES = ("high", "medium", "low")
+
+def shopping_priority(needed_qty, max_qty):
+    """Return the shopping list priority for an item that needs needed_qty more units."""
+    if isinstance(needed_qty, int) and isinstance(max_qty, int):
+        # Integer thresholds: ceil(80%) and ceil(50%) of the weekly max
+        high_threshold = (max_qty * 8 + 9) // 10
+        medium_threshold = (max_qty + 1) // 2
+        return PRIORITIES[(needed_qty < high_threshold) + (needed_qty < medium_threshold)]
+    # Fractional quantities keep the plain float comparison
+    return "high" if needed_qty >= max_qty * 0.8 else "medium" if needed_qty >= max_qty * 0.5 else "low"
+
+# Background executor for process-inventory jobs. The pipeline is dominated by
+# network-bound Gemini/CrewAI calls, so threads keep the request thread free.
+_EXEC = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Job status/results are stored in SQLite so any server worker can answer polls
+JOBS_DB_PATH = os.getenv('JOBS_DB_PATH', os.path.join(os.path.dirname(__file__), 'jobs.db'))
+
+# Parsed copy of the current grocery list file, reused until the file changes.
+# The file itself is the source of truth shared by all workers.
+_grocery_list_lock = threading.Lock()
+_grocery_list = None
+_grocery_list_stamp = None
+_grocery_list_etag = None
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def sniff_image_extension(image_data):
+    """
+    Cheaply check whether uploaded bytes are a usable JPEG or PNG.
+
+    Only the magic bytes and the header carrying the dimensions are parsed.
+
+    Args:
+        image_data: Raw bytes of the uploaded image
+
+    Returns:
+        'jpg' or 'png' if the image can be saved as-is, otherwise None
+    """
+    if image_data[:8] == PNG_SIGNATURE:
+        # The IHDR chunk always comes first and holds width/height
+        if len(image_data) >= 24 and image_data[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', image_data[16:24])
+            if width > 0 and height > 0:
+                return 'png'
+        return None
+
+    if image_data[:3] == JPEG_SOI:
+        # Walk the marker segments up to the start-of-frame header
+        offset = 2
+        while offset + 9 <= len(image_data):
+            if image_data[offset] != 0xFF:
+                return None
+            marker = image_data[offset + 1]
+            if marker == 0xFF:
+                # Fill byte before a marker
+                offset += 1
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', image_data[offset + 5:offset + 9])
+                return 'jpg' if width > 0 and height > 0 else None
+            segment_length = struct.unpack('>H', image_data[offset + 2:offset + 4])[0]
+            offset += 2 + segment_length
+    return None
+
+def _connect_jobs_db():
+    """Open a connection to the jobs database, creating the table if needed."""
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "id TEXT PRIMARY KEY, status TEXT NOT NULL, http_status INTEGER NOT NULL, "
+        "result TEXT, updated_at TEXT NOT NULL)"
+    )
+    return conn
+
+def save_job(job_id, status, http_status, result=None):
+    """Create or update a job row with its status and (optional) result."""
+    with closing(_connect_jobs_db()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, status, http_status, result, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (job_id, status, http_status,
+             json.dumps(result) if result is not None else None,
+             datetime.now().isoformat())
+        )
+
+def load_job(job_id):
+    """Load a job as (status, http_status, result), or None if it doesn't exist."""
+    with closing(_connect_jobs_db()) as conn:
+        row = conn.execute(
+            "SELECT status, http_status, result FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    status, http_status, result = row
+    return status, http_status, json.loads(result) if result else None
+
 def load_default_grocery_list():
     """Load the default weekly grocery list template."""
     try:
@@ -52,40 +172,124 @@ def load_default_grocery_list():
         logger.error(f"Error loading default grocery list: {e}")
         return None
 
-def load_current_grocery_list():
-    """Load the current grocery list, or create from default if doesn't exist."""
+def _grocery_list_digest(payload):
+    """Compute the ETag for a serialized grocery list."""
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+@contextmanager
+def _grocery_list_file_lock():
+    """Hold the grocery list lock across threads and worker processes."""
+    with _grocery_list_lock, open(GROCERY_LIST_LOCK_PATH, 'a') as lock_file:
+        if fcntl is not None:
+            # Released when the lock file is closed
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        yield
+
+def _grocery_list_file_stamp(st):
+    """
+    Identify one version of the grocery list file.
+
+    Every save os.replace()s in a new file, so the inode changes even when two
+    workers write within the same mtime tick.
+    """
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+def _read_grocery_list_locked():
+    """Return the current grocery list from file, or None if there is none. Caller holds _grocery_list_lock."""
+    global _grocery_list, _grocery_list_stamp, _grocery_list_etag
     try:
-        if os.path.exists(CURRENT_GROCERY_LIST_PATH):
-            with open(CURRENT_GROCERY_LIST_PATH, 'r') as f:
-                return json.load(f)
-        else:
-            # Create from default
-            default_list = load_default_grocery_list()
-            if default_list:
-                save_current_grocery_list(default_list)
-                return default_list
-            return None
+        f = open(CURRENT_GROCERY_LIST_PATH, 'rb')
+    except FileNotFoundError:
+        return None
+
+    # Reparse only if the file was rewritten (possibly by another worker
+    # process). The stamp comes from the open file, so it always matches
+    # the contents read below
+    with f:
+        stamp = _grocery_list_file_stamp(os.fstat(f.fileno()))
+        if _grocery_list is None or stamp != _grocery_list_stamp:
+            payload = f.read()
+            _grocery_list = orjson.loads(payload)
+            _grocery_list_etag = _grocery_list_digest(payload)
+            _grocery_list_stamp = stamp
+    return _grocery_list
+
+def _write_grocery_list_locked(grocery_list):
+    """Atomically write the grocery list to file. Caller holds the grocery list file lock."""
+    global _grocery_list, _grocery_list_stamp, _grocery_list_etag
+    tmp_path = f"{CURRENT_GROCERY_LIST_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        payload = orjson.dumps(grocery_list)
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            # The rename keeps inode, mtime and size
+            stamp = _grocery_list_file_stamp(os.fstat(f.fileno()))
+        os.replace(tmp_path, CURRENT_GROCERY_LIST_PATH)
+        _grocery_list = grocery_list
+        _grocery_list_etag = _grocery_list_digest(payload)
+        _grocery_list_stamp = stamp
+        return True
+    except Exception as e:
+        logger.error(f"Error saving grocery list: {e}")
+        # The cached copy may hold unsaved changes; reload from disk next time
+        _grocery_list = None
+        _grocery_list_stamp = None
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return False
+
+def load_current_grocery_list_with_etag():
+    """
+    Load the current grocery list together with its ETag, or create it from
+    default if it doesn't exist. Returns (None, None) on failure.
+    """
+    try:
+        # Read the list and its ETag under one lock so they always match
+        with _grocery_list_lock:
+            grocery_list = _read_grocery_list_locked()
+            etag = _grocery_list_etag
+        if grocery_list is not None:
+            return grocery_list, etag
+
+        # Create from default, unless another worker already has
+        default_list = load_default_grocery_list()
+        if not default_list:
+            return None, None
+        with _grocery_list_file_lock():
+            grocery_list = _read_grocery_list_locked()
+            if grocery_list is None and _write_grocery_list_locked(default_list):
+                grocery_list = default_list
+            return grocery_list, _grocery_list_etag if grocery_list is not None else None
     except Exception as e:
         logger.error(f"Error loading current grocery list: {e}")
-        return None
+        return None, None
+
+def load_current_grocery_list():
+    """Load the current grocery list, or create from default if doesn't exist."""
+    return load_current_grocery_list_with_etag()[0]
 
 def save_current_grocery_list(grocery_list):
-    """Save the current grocery list to file."""
+    """Save the current grocery list to file; returns False if the write failed."""
     try:
-        with open(CURRENT_GROCERY_LIST_PATH, 'w') as f:
-            json.dump(grocery_list, f, indent=2)
-        return True
+        with _grocery_list_file_lock():
+            return _write_grocery_list_locked(grocery_list)
     except Exception as e:
         logger.error(f"Error saving grocery list: {e}")
         return False
 
-def match_item_to_grocery_key(item_name, grocery_list):
+# Maximum number of concurrent Gemini matching requests (respects rate limits)
+MATCH_CONCURRENCY = 8
+
+async def match_item_to_grocery_key(item_name, grocery_list, semaphore=None):
     """
     Use Gemini AI to match a receipt item to the closest default grocery key.
 
     Args:
         item_name: The item name from the receipt (e.g., "FF BS BREAST", "KS DICED TOM")
         grocery_list: The default grocery list with categories
+        semaphore: Optional asyncio.Semaphore bounding concurrent Gemini calls
 
     Returns:
         Tuple of (category, key) or (None, None) if no match
@@ -130,7 +334,13 @@ Examples:
 Now match: "{item_name}"
 Return only the category:key"""
 
-        response = model.generate_content(prompt)
+        # The sync client runs in a worker thread: the async client is bound to
+        # the event loop it was created on and each request runs its own loop
+        if semaphore is None:
+            response = await asyncio.to_thread(model.generate_content, prompt)
+        else:
+            async with semaphore:
+                response = await asyncio.to_thread(model.generate_content, prompt)
         result = response.text.strip()
 
         # Parse result
@@ -154,12 +364,15 @@ Return only the category:key"""
         logger.error(f"Error matching item '{item_name}': {e}")
         return None, None
 
-def update_grocery_list_from_inventory(inventory_data):
+async def update_grocery_list_from_inventory(inventory_data):
     """
     Update the current grocery list based on detected inventory items.
 
+    Items are matched against the grocery list concurrently; updates are then
+    applied serially in receipt order.
+
     Args:
-        inventory_data: The inventory data from CrewAI (from inventory.json)
+        inventory_data: The inventory data from CrewAI (from inventory_<run_id>.json)
 
     Returns:
         Updated grocery list
@@ -177,43 +390,58 @@ def update_grocery_list_from_inventory(inventory_data):
 
         logger.info(f"Updating grocery list with {len(items)} inventory items")
 
-        # Process each item
-        for item in items:
-            item_name = item.get('item', '')
-            quantity = item.get('quantity', 0)
-
-            if not item_name:
-                continue
-
-            # Match to grocery key using AI
-            category, key = match_item_to_grocery_key(item_name, grocery_list)
-
-            if category and category != "new_item":
-                # Update existing item
-                if category in grocery_list['categories'] and key in grocery_list['categories'][category]:
-                    current_qty = grocery_list['categories'][category][key].get('quantity', 0)
-                    new_qty = current_qty + quantity
-                    grocery_list['categories'][category][key]['quantity'] = new_qty
-                    logger.info(f"Updated {category}:{key} quantity from {current_qty} to {new_qty}")
-            elif category == "new_item":
-                # Add as new item in a custom category
-                if 'custom' not in grocery_list['categories']:
-                    grocery_list['categories']['custom'] = {}
-
-                # Create a safe key from item name
-                safe_key = item_name.lower().replace(' ', '_').replace('-', '_')
-
-                grocery_list['categories']['custom'][safe_key] = {
-                    "quantity": quantity,
-                    "max_per_week": quantity * 2,  # Default max is 2x current
-                    "unit": "unit",
-                    "original_name": item_name
-                }
-                logger.info(f"Added new custom item: {safe_key} with quantity {quantity}")
-
-        # Save updated list
-        grocery_list['last_updated'] = datetime.now().isoformat()
-        save_current_grocery_list(grocery_list)
+        # Skip items without a name
+        items = [item for item in items if item.get('item', '')]
+
+        # Match all items to grocery keys using AI, fanned out concurrently
+        semaphore = asyncio.Semaphore(MATCH_CONCURRENCY)
+        matches = await asyncio.gather(*[
+            match_item_to_grocery_key(item['item'], grocery_list, semaphore)
+            for item in items
+        ])
+
+        # Apply updates serially from the match results. The list is re-read
+        # and saved under the file lock so that updates made by other workers
+        # while the matches ran are not overwritten.
+        with _grocery_list_file_lock():
+            latest = _read_grocery_list_locked()
+            if latest is not None:
+                # Work on a copy so a failed update never leaves the cache modified
+                grocery_list = orjson.loads(orjson.dumps(latest))
+
+            for item, (category, key) in zip(items, matches):
+                item_name = item['item']
+                quantity = item.get('quantity', 0)
+
+                if category and category != "new_item":
+                    # Update existing item
+                    if category in grocery_list['categories'] and key in grocery_list['categories'][category]:
+                        current_qty = grocery_list['categories'][category][key].get('quantity', 0)
+                        new_qty = current_qty + quantity
+                        grocery_list['categories'][category][key]['quantity'] = new_qty
+                        logger.info(f"Updated {category}:{key} quantity from {current_qty} to {new_qty}")
+                elif category == "new_item":
+                    # Add as new item in a custom category
+                    if 'custom' not in grocery_list['categories']:
+                        grocery_list['categories']['custom'] = {}
+
+                    # Create a safe key from item name
+                    safe_key = item_name.lower().replace(' ', '_').replace('-', '_')
+
+                    grocery_list['categories']['custom'][safe_key] = {
+                        "quantity": quantity,
+                        "max_per_week": quantity * 2,  # Default max is 2x current
+                        "unit": "unit",
+                        "original_name": item_name
+                    }
+                    logger.info(f"Added new custom item: {safe_key} with quantity {quantity}")
+
+            # Save updated list
+            grocery_list['last_updated'] = datetime.now().isoformat()
+            saved = _write_grocery_list_locked(grocery_list)
+
+        if not saved:
+            return None
 
         return grocery_list
 
@@ -221,17 +449,38 @@ def update_grocery_list_from_inventory(inventory_data):
         logger.error(f"Error updating grocery list from inventory: {e}", exc_info=True)
         return None
 
-def transform_crewai_output_to_inventory(_crew_result=None):
+def load_crew_inventory(run_id):
+    """
+    Read the inventory file written by one crew run, or None if it is missing.
+
+    Each crew run names its inventory inventory_<run_id>.json, so concurrent
+    jobs, in this or another server worker, never read each other's results.
+
+    Args:
+        run_id: Run id of the crew that processed the receipt
+    """
+    output_dir = os.getenv('OUTPUT_DIR', './outputs')
+    inventory_path = os.path.join(output_dir, f'inventory_{run_id}.json')
+    try:
+        with open(inventory_path, 'rb') as f:
+            inventory_data = orjson.loads(f.read())
+    except FileNotFoundError:
+        logger.error(f"Inventory file not found: {inventory_path}")
+        return None
+    logger.info(f"Read inventory from {inventory_path}")
+    return inventory_data
+
+def transform_crewai_output_to_inventory(inventory_data):
     """
     Transform CrewAI output to frontend-compatible inventory format.
 
-    The CrewAI crew creates inventory.json in the outputs folder.
-    We read that file and transform it to the frontend format.
+    The CrewAI crew creates inventory_<run_id>.json in the outputs folder;
+    load_crew_inventory reads it and this transforms it to the frontend format.
 
     Args:
-        _crew_result: Crew execution result (unused, we read from file instead)
+        inventory_data: Contents of the crew run's inventory file
 
-    Expected inventory.json format:
+    Expected inventory file format:
     {
       "inventory": {
         "date": "04/20/2016",
@@ -248,32 +497,10 @@ def transform_crewai_output_to_inventory(_crew_result=None):
     }
     """
     try:
-        logger.info("Transforming CrewAI output from inventory.json")
-
-        # The crew creates files in the outputs directory
-        # Read the latest inventory file
-        import glob
-        output_dir = os.getenv('OUTPUT_DIR', './outputs')
-
-        # Try to find inventory.json first
-        inventory_path = os.path.join(output_dir, 'inventory.json')
-        inventory_data = None
-
-        if os.path.exists(inventory_path):
-            logger.info(f"Reading inventory from {inventory_path}")
-            with open(inventory_path, 'r') as f:
-                inventory_data = json.load(f)
-        else:
-            # Try to find inventory_*.json files
-            inventory_files = glob.glob(os.path.join(output_dir, 'inventory_*.json'))
-            if inventory_files:
-                latest_file = max(inventory_files, key=os.path.getctime)
-                logger.info(f"Reading inventory from {latest_file}")
-                with open(latest_file, 'r') as f:
-                    inventory_data = json.load(f)
+        logger.info("Transforming CrewAI inventory output")
 
         if not inventory_data:
-            logger.error("No inventory file found")
+            logger.error("No inventory data to transform")
             return None
 
         # Extract inventory data
@@ -317,56 +544,44 @@ def transform_crewai_output_to_inventory(_crew_result=None):
         logger.error(f"Error transforming CrewAI output: {str(e)}", exc_info=True)
         return None
 
-@app.route('/')
-def root():
-    return jsonify({"message": "Inventory Management API is running!"})
-
-@app.route('/process-inventory', methods=['POST'])
-def process_inventory():
-    """
-    Process uploaded image and return inventory information.
-    Frontend sends to: /process-inventory
+def _process_job(job_id, image_data):
     """
-    try:
-        logger.info("Received process-inventory request")
-
-        # Check if file is present - frontend sends as 'image'
-        if 'image' not in request.files:
-            logger.error("No image file in request")
-            return jsonify({"error": "No file provided"}), 400
-
-        file = request.files['image']
-
-        # Check if file is selected
-        if file.filename == '':
-            logger.error("Empty filename")
-            return jsonify({"error": "No file selected"}), 400
+    Run the full inventory pipeline for an uploaded image in the background.
 
-        # Validate file type
-        if not allowed_file(file.filename):
-            logger.error(f"Invalid file type: {file.filename}")
-            return jsonify({"error": "File must be an image"}), 400
+    Validates and saves the image, runs the CrewAI crew, transforms its output
+    and updates the grocery list. The outcome is stored in the jobs table.
 
-        # Read image data
-        image_data = file.read()
-
-        # Validate image can be opened
-        try:
-            image = Image.open(BytesIO(image_data))
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-        except Exception as e:
-            logger.error(f"Invalid image file: {str(e)}")
-            return jsonify({"error": "Invalid image file"}), 400
-
-        # Save image to temporary file for CrewAI processing
+    Args:
+        job_id: Identifier of the job row to update
+        image_data: Raw bytes of the uploaded image
+    """
+    try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = secure_filename(f"receipt_{timestamp}.jpg")
-        image_path = os.path.join(UPLOAD_FOLDER, filename)
+        extension = sniff_image_extension(image_data)
+
+        if extension:
+            # Fast path: valid JPEG/PNG bytes are saved as-is, no decode/re-encode
+            filename = secure_filename(f"receipt_{timestamp}_{job_id}.{extension}")
+            image_path = os.path.join(UPLOAD_FOLDER, filename)
+            with open(image_path, 'wb') as f:
+                f.write(image_data)
+        else:
+            # Validate image can be opened
+            try:
+                image = Image.open(BytesIO(image_data))
+                # Convert to RGB if necessary
+                if image.mode != 'RGB':
+                    image = image.convert('RGB')
+            except Exception as e:
+                logger.error(f"Invalid image file: {str(e)}")
+                save_job(job_id, 'failed', 400, {"error": "Invalid image file"})
+                return
+
+            # Save image to temporary file for CrewAI processing
+            filename = secure_filename(f"receipt_{timestamp}_{job_id}.jpg")
+            image_path = os.path.join(UPLOAD_FOLDER, filename)
+            image.save(image_path, 'JPEG', quality=95)
 
-        # Save the image
-        image.save(image_path, 'JPEG', quality=95)
         logger.info(f"Saved image to: {image_path}")
 
         # Process image with CrewAI
@@ -379,8 +594,9 @@ def process_inventory():
 
             logger.info(f"CrewAI processing complete. Result: {result}")
 
-            # Transform CrewAI output to frontend format
-            inventory_result = transform_crewai_output_to_inventory(result)
+            # Read this run's inventory file and transform it to frontend format
+            inventory_data = load_crew_inventory(crew_instance._run_id)
+            inventory_result = transform_crewai_output_to_inventory(inventory_data)
 
             if inventory_result is None:
                 logger.warning("Failed to transform CrewAI output, using fallback")
@@ -401,22 +617,12 @@ def process_inventory():
                 # Update grocery list with detected items
                 logger.info("Updating grocery list with detected inventory items...")
                 try:
-                    # Read inventory.json to get the full data
-                    output_dir = os.getenv('OUTPUT_DIR', './outputs')
-                    inventory_path = os.path.join(output_dir, 'inventory.json')
-
-                    if os.path.exists(inventory_path):
-                        with open(inventory_path, 'r') as f:
-                            inventory_data = json.load(f)
-
-                        # Update grocery list
-                        updated_grocery_list = update_grocery_list_from_inventory(inventory_data)
-                        if updated_grocery_list:
-                            logger.info("Successfully updated grocery list")
-                        else:
-                            logger.warning("Failed to update grocery list")
+                    # Update grocery list from the same run's inventory
+                    updated_grocery_list = asyncio.run(update_grocery_list_from_inventory(inventory_data))
+                    if updated_grocery_list:
+                        logger.info("Successfully updated grocery list")
                     else:
-                        logger.warning("inventory.json not found, skipping grocery list update")
+                        logger.warning("Failed to update grocery list")
                 except Exception as e:
                     logger.error(f"Error updating grocery list: {e}")
 
@@ -427,7 +633,7 @@ def process_inventory():
             except Exception as e:
                 logger.warning(f"Failed to cleanup temporary file: {str(e)}")
 
-            return jsonify(inventory_result)
+            save_job(job_id, 'done', 200, inventory_result)
 
         except Exception as e:
             logger.error(f"CrewAI processing error: {str(e)}", exc_info=True)
@@ -443,20 +649,86 @@ def process_inventory():
             except:
                 pass
 
-            # Return detailed error for debugging
-            return jsonify({
+            # Store detailed error for debugging
+            save_job(job_id, 'failed', 500, {
                 "error": f"Error processing image with AI: {str(e)}",
                 "error_type": type(e).__name__,
                 "error_details": str(e),
                 "date": datetime.now().strftime("%Y-%m-%d"),
                 "items": [],
                 "debug_info": "Check Flask terminal for full error details"
-            }), 500
+            })
+
+    except Exception as e:
+        logger.error(f"Error in process-inventory job {job_id}: {str(e)}", exc_info=True)
+        save_job(job_id, 'failed', 500, {"error": f"Error processing image: {str(e)}"})
+
+@app.route('/')
+def root():
+    return jsonify({"message": "Inventory Management API is running!"})
+
+@app.route('/process-inventory', methods=['POST'])
+def process_inventory():
+    """
+    Accept an uploaded image and queue it for inventory processing.
+    Frontend sends to: /process-inventory, then polls /process-inventory/<job_id>
+    """
+    try:
+        logger.info("Received process-inventory request")
+
+        # Check if file is present - frontend sends as 'image'
+        if 'image' not in request.files:
+            logger.error("No image file in request")
+            return jsonify({"error": "No file provided"}), 400
+
+        file = request.files['image']
+
+        # Check if file is selected
+        if file.filename == '':
+            logger.error("Empty filename")
+            return jsonify({"error": "No file selected"}), 400
+
+        # Validate file type
+        if not allowed_file(file.filename):
+            logger.error(f"Invalid file type: {file.filename}")
+            return jsonify({"error": "File must be an image"}), 400
+
+        # Read image data
+        image_data = file.read()
+
+        # Hand the heavy work to the background executor
+        job_id = uuid.uuid4().hex
+        save_job(job_id, 'pending', 202)
+        _EXEC.submit(_process_job, job_id, image_data)
+        logger.info(f"Queued process-inventory job {job_id}")
+
+        return jsonify({"job_id": job_id, "status": "pending"}), 202
 
     except Exception as e:
         logger.error(f"Error in process_inventory endpoint: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error processing image: {str(e)}"}), 500
 
+@app.route('/process-inventory/<job_id>', methods=['GET'])
+def get_process_inventory_job(job_id):
+    """
+    Get the status, and once finished the result, of a process-inventory job.
+    """
+    try:
+        job = load_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+
+        status, http_status, result = job
+        response = {"job_id": job_id, "status": status}
+        if result:
+            response.update(result)
+
+        return jsonify(response), http_status
+
+    except Exception as e:
+        logger.error(f"Error getting process-inventory job {job_id}: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/generate-shopping-list', methods=['POST'])
 def generate_shopping_list():
     """
@@ -491,7 +763,7 @@ def generate_shopping_list():
                         "name": item_name,
                         "quantity": f"{needed_qty} {unit}",
                         "category": category_name,
-                        "priority": "high" if needed_qty >= max_qty * 0.8 else "medium" if needed_qty >= max_qty * 0.5 else "low"
+                        "priority": shopping_priority(needed_qty, max_qty)
                     })
 
                 # Add to current inventory if you have any
@@ -544,7 +816,8 @@ def reset_grocery_list():
             return jsonify({"error": "Could not load default grocery list"}), 500
 
         # Save as current
-        save_current_grocery_list(default_list)
+        if not save_current_grocery_list(default_list):
+            return jsonify({"error": "Could not save grocery list"}), 500
 
         return jsonify({
             "success": True,
@@ -559,13 +832,23 @@ def reset_grocery_list():
 def get_grocery_list():
     """
     Get the current grocery list.
+    Supports If-None-Match, returning 304 when the list hasn't changed.
     """
     try:
-        grocery_list = load_current_grocery_list()
+        grocery_list, etag = load_current_grocery_list_with_etag()
         if not grocery_list:
             return jsonify({"error": "Could not load grocery list"}), 500
 
-        return jsonify(grocery_list)
+        # Conditional GET: unchanged lists are answered without a body
+        if etag and request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        response = jsonify(grocery_list)
+        if etag:
+            response.set_etag(etag)
+        return response
 
     except Exception as e:
         logger.error(f"Error getting grocery list: {e}")
@@ -588,7 +871,8 @@ def upload_grocery_list():
 
         # Save the list
         grocery_list['last_updated'] = datetime.now().isoformat()
-        save_current_grocery_list(grocery_list)
+        if not save_current_grocery_list(grocery_list):
+            return jsonify({"error": "Could not save grocery list"}), 500
 
         return jsonify({
             "success": True,
@@ -610,6 +894,18 @@ def health_check():
     })
 
 if __name__ == '__main__':
-    logger.info("Starting Flask application...")
+    # Serve with gunicorn: multiple worker processes, each with a thread pool,
+    # instead of the single-threaded Werkzeug development server
+    port = int(os.getenv('PORT', '8000'))
+    workers = int(os.getenv('WEB_CONCURRENCY', 2 * os.cpu_count() + 1))
+    logger.info("Starting Flask application with gunicorn...")
     logger.info(f"Upload folder: {UPLOAD_FOLDER}")
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    subprocess.run([
+        'gunicorn',
+        '-w', str(workers),
+        '-k', 'gthread',
+        '--threads', '4',
+        '--chdir', os.path.dirname(os.path.abspath(__file__)),
+        '-b', f'0.0.0.0:{port}',
+        'app:app'
+    ])
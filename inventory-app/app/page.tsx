@@ -101,13 +101,30 @@ export default function InventoryApp() {
             try {
               if (isConnected) {
                 console.log("[v0] Attempting to call backend...")
-                const response = await fetch("http://localhost:8000/process-inventory", {
+                const enqueueResponse = await fetch("http://localhost:8000/process-inventory", {
                   method: "POST",
                   mode: "cors",
                   body: formData,
                 })
 
-                const data = await response.json()
+                let response = enqueueResponse
+                let data = await response.json()
+
+                // Processing runs in the background - poll until the job finishes
+                const POLL_INTERVAL_MS = 1500
+                const MAX_POLL_ATTEMPTS = 200 // ~5 minutes
+                let pollAttempts = 0
+                while (response.ok && data.status === "pending" && data.job_id) {
+                  if (++pollAttempts > MAX_POLL_ATTEMPTS) {
+                    throw new Error("Timed out waiting for the receipt to be processed")
+                  }
+                  await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+                  response = await fetch(`http://localhost:8000/process-inventory/${data.job_id}`, {
+                    method: "GET",
+                    mode: "cors",
+                  })
+                  data = await response.json()
+                }
                 console.log("[v0] Backend response received:", data)
 
                 if (!response.ok) {
@@ -18,5 +18,5 @@ echo "Installing dependencies..."
 pip install -r requirements.txt
 
 # Start the server
-echo "Starting FastAPI server on http://localhost:8000"
-uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+echo "Starting Flask server on http://localhost:8000"
+python app.py
@@ -5,11 +5,18 @@ Test script to verify SmartShop Crew integration in inventory-app
 
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add the src directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+@lru_cache(maxsize=1)
+def _get_crew():
+    """Build the SmartShop crew once and share it across tests."""
+    from smart_shop.crew import SmartShop
+    return SmartShop()
+
 def test_crew_imports():
     """Test that crew components can be imported."""
     print("Testing crew imports...")
@@ -28,13 +35,11 @@ def test_crew_initialization():
     print("Testing crew initialization...")
     
     try:
-        from smart_shop.crew import SmartShop
-        
         # Check environment variables
         if not os.getenv('GOOGLE_AI_API_KEY'):
             print("⚠️  GOOGLE_AI_API_KEY not set - crew will use fallback")
         
-        crew_instance = SmartShop()
+        crew_instance = _get_crew()
         print("✅ Crew initialization successful")
         
         # Test crew kickoff method
@@ -57,7 +62,11 @@ def test_image_tool():
     print("Testing image processing tool...")
     
     try:
-        from smart_shop.tools.image_to_json_tool import ImageToJSONTool
+        from smart_shop.tools import ImageToJSONTool
+        from smart_shop.tools import image_to_json_tool
+        
+        # The package export and the module must be the same single class
+        assert ImageToJSONTool is image_to_json_tool.ImageToJSONTool
         
         tool = ImageToJSONTool()
         print("✅ Image processing tool initialization successful")
@@ -71,9 +80,7 @@ def test_crew_workflow():
     print("Testing crew workflow integration...")
     
     try:
-        from smart_shop.crew import SmartShop
-        
-        crew_instance = SmartShop()
+        crew_instance = _get_crew()
         
         # Test that the crew has the required agents and tasks
         if hasattr(crew_instance, 'agents') and hasattr(crew_instance, 'tasks'):
@@ -5,6 +5,7 @@ This script helps configure the environment for the crew.
 """
 
 import os
+import shutil
 import sys
 from pathlib import Path
 
@@ -23,12 +24,8 @@ def create_env_file():
         return False
     
     try:
-        # Copy template to .env
-        with open(template_file, 'r') as f:
-            content = f.read()
-        
-        with open(env_file, 'w') as f:
-            f.write(content)
+        # Copy template to .env (byte-for-byte, kernel-side copy where available)
+        shutil.copyfile(template_file, env_file)
         
         print("✅ Created .env file from template")
         print("📝 Please edit .env file and add your Google AI API key")
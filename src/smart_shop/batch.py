@@ -0,0 +1,60 @@
+"""
+Batch entry point for processing several receipt images with the SmartShop crew.
+
+Each kickoff spends nearly all of its time waiting on Gemini over the network,
+so running them on a thread pool overlaps that latency across images.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .crew import SmartShop
+
+
+# Keep the default low so parallel kickoffs stay within Gemini's per-minute
+# token quota; raise it with KICKOFF_WORKERS when the quota allows.
+DEFAULT_KICKOFF_WORKERS = 4
+
+
+def _kickoff_one(image_path):
+    """Run a full crew kickoff for a single image."""
+    # Crew objects hold per-run agent and task state, so every image gets its own
+    crew = SmartShop().crew()
+    return crew.kickoff(
+        inputs={
+            "image_path": image_path,
+            "topic": "receipt_processing"
+        }
+    )
+
+
+def kickoff_many(image_paths, workers=None):
+    """
+    Run the crew over several images concurrently.
+
+    Args:
+        image_paths: Iterable of image file paths
+        workers: Number of concurrent kickoffs (defaults to KICKOFF_WORKERS env var)
+
+    Returns:
+        Dict mapping each image path to its crew result, or to the exception
+        raised while processing it
+    """
+    image_paths = list(image_paths)
+    if not image_paths:
+        return {}
+
+    if workers is None:
+        workers = int(os.getenv('KICKOFF_WORKERS', DEFAULT_KICKOFF_WORKERS))
+    workers = max(1, min(workers, len(image_paths)))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_kickoff_one, path): path for path in image_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+    return results
@@ -1,16 +1,32 @@
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, agent, crew, task, before_kickoff
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
+from datetime import datetime
 from .tools.image_to_json_tool import ImageToJSONTool
 from .tools.inventory_creator_tool import InventoryCreatorTool
 import os
+import uuid
 from dotenv import load_dotenv
 from crewai.llm import LLM
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Required environment variables; once they are found the check is skipped
+REQUIRED_ENV_VARS = ('GEMINI_API_KEY',)
+_ENV_OK = False
+
+
+def _check_env_once():
+    """Return the missing required environment variables (empty once validated)."""
+    global _ENV_OK
+    if _ENV_OK:
+        return []
+    missing_vars = [var for var in REQUIRED_ENV_VARS if not os.environ.get(var)]
+    _ENV_OK = not missing_vars
+    return missing_vars
+
 
 @CrewBase
 class SmartShop():
@@ -23,16 +39,32 @@ class SmartShop():
         """Initialize the crew and validate environment setup."""
         super().__init__()
         self._validate_environment()
+        # State shared with the tools: the run id and the results they hand
+        # to each other in memory. Reset before every kickoff, so a reused
+        # instance never sees a previous run's id or results
+        self._run_state = {}
+        self._start_run()
+
+    def _start_run(self):
+        """Begin a new crew run with a fresh run id and no tool results."""
+        # One id per crew run, shared by all output filenames. The random part
+        # keeps crews started within the same second (e.g. by kickoff_many)
+        # from writing to, or reading, each other's files
+        self._run_id = f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{uuid.uuid4().hex[:12]}'
+        self._run_state.clear()
+        self._run_state["run_id"] = self._run_id
+
+    @before_kickoff
+    def prepare_run(self, inputs):
+        """Start a new run for every kickoff and expose its id to the task output files."""
+        self._start_run()
+        inputs = dict(inputs or {})
+        inputs["run_id"] = self._run_id
+        return inputs
 
     def _validate_environment(self):
         """Validate that required environment variables are set."""
-        required_vars = ['GEMINI_API_KEY']
-        missing_vars = []
-        
-        for var in required_vars:
-            if not os.getenv(var):
-                missing_vars.append(var)
-        
+        missing_vars = _check_env_once()
         if missing_vars:
             raise ValueError(
                 f"Missing required environment variables: {', '.join(missing_vars)}\n"
@@ -41,12 +73,16 @@ class SmartShop():
             )
 
     def _get_llm(self):
-        """Configure LLM to use Google's Gemini model."""
-        return LLM(
-            model="gemini/gemini-2.5-flash",
-            api_key=os.getenv('GEMINI_API_KEY'),
-            temperature=0.1
-        )
+        """Configure LLM to use Google's Gemini model, shared by all agents."""
+        llm = getattr(self, '_llm', None)
+        if llm is None:
+            llm = LLM(
+                model="gemini/gemini-2.5-flash",
+                api_key=os.getenv('GEMINI_API_KEY'),
+                temperature=0.1
+            )
+            self._llm = llm
+        return llm
 
     # Learn more about YAML configuration files here:
     # Agents: https://docs.crewai.com/concepts/agents#yaml-configuration-recommended
@@ -58,7 +94,7 @@ class SmartShop():
     def image_processor(self) -> Agent:
         return Agent(
             config=self.agents_config['image_processor'], # type: ignore[index]
-            tools=[ImageToJSONTool()],
+            tools=[ImageToJSONTool(run_state=self._run_state)],
             llm=self._get_llm(),
             verbose=True
         )
@@ -67,7 +103,7 @@ class SmartShop():
     def inventory_manager(self) -> Agent:
         return Agent(
             config=self.agents_config["inventory_manager"],  # type: ignore[index]
-            tools=[InventoryCreatorTool()],
+            tools=[InventoryCreatorTool(run_state=self._run_state)],
             llm=self._get_llm(),
             verbose=True,
         )
@@ -77,10 +113,8 @@ class SmartShop():
     # https://docs.crewai.com/concepts/tasks#overview-of-a-task
     @task
     def image_processing_task(self) -> Task:
-        # Generate unique filename with timestamp
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f'image_analysis_{timestamp}.json'
+        # Unique filename from the run id, filled in from the kickoff inputs
+        unique_filename = 'image_analysis_{run_id}.json'
         
         return Task(
             config=self.tasks_config['image_processing_task'], # type: ignore[index]
@@ -90,10 +124,8 @@ class SmartShop():
     
     @task
     def inventory_managing_task(self) -> Task:
-        # Generate unique filename with timestamp for inventory
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        inventory_filename = f'inventory_{timestamp}.json'
+        # Unique filename from the run id for inventory, filled in from the kickoff inputs
+        inventory_filename = 'inventory_{run_id}.json'
         
         return Task(
             config=self.tasks_config["inventory_managing_task"],  # type: ignore[index]
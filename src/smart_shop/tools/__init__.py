@@ -0,0 +1,4 @@
+from .image_to_json_tool import ImageToJSONTool
+from .inventory_creator_tool import InventoryCreatorTool
+
+__all__ = ["ImageToJSONTool", "InventoryCreatorTool"]
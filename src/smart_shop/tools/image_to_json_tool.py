@@ -1,17 +1,235 @@
 from crewai.tools import BaseTool
-from typing import Type, Dict, Any, Optional
+from typing import Type, Dict, Any, ClassVar, Optional, Tuple
 from pydantic import BaseModel, Field
+import asyncio
+import io
 import os
-import json
+import re
+import sys
+import threading
 import base64
+import orjson
 from pathlib import Path
 import google.generativeai as genai
-from PIL import Image
-from dotenv import load_dotenv
-from datetime import datetime
+from PIL import Image, ImageOps
+from datetime import datetime, timedelta
+import hashlib
+import random
+import secrets
+import time
+from google.api_core.exceptions import ResourceExhausted
 
-# Load environment variables
-load_dotenv()
+try:
+    from blake3 import blake3 as _cache_hash
+except ImportError:
+    _cache_hash = hashlib.sha256
+
+# Gemini model used for image analysis
+MODEL_NAME = 'gemini-2.5-flash'
+
+# Outermost JSON object in a model response (first '{' to last '}')
+_JSON_RE = re.compile(rb'\{.*\}', re.DOTALL)
+# Saved files are indented for people; results returned to the crew are
+# compact, since agents parse them
+_ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+_ORJSON_COMPACT_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# How long a prompt stays in Gemini's context cache
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+# Gemini rejects context caches smaller than this many tokens
+CONTEXT_CACHE_MIN_TOKENS = 1024
+# Prompts shorter than this many characters can't plausibly reach the minimum
+# (English text runs about 4 characters per token), so they are sent inline
+# without asking Gemini to count their tokens. This covers DEFAULT_RECEIPT_PROMPT
+CONTEXT_CACHE_MIN_CHARS = CONTEXT_CACHE_MIN_TOKENS * 3
+
+# Attempts per Gemini call when the quota is exhausted (HTTP 429)
+GEMINI_MAX_ATTEMPTS = 5
+
+# Default prompt for receipt images
+DEFAULT_RECEIPT_PROMPT = """
+Analyze this image and convert it to a structured JSON format following this EXACT structure:
+
+{
+  "image_description": "Brief description of what you see in the image",
+  "text": {
+    "store_information": "Store name, address, phone if visible",
+    "member_information": "Member details if visible",
+    "items_purchased": [
+      {"item": "Item name", "quantity": 1, "price": 0.00},
+      {"item": "Item name", "quantity": 1, "price": 0.00}
+    ],
+    "totals": {
+      "subtotal": 0.00,
+      "tax": 0.00,
+      "total": 0.00
+    },
+    "payment_information": {
+      "aid": "Payment aid if visible",
+      "seq": "Sequence number if visible",
+      "app": "App number if visible",
+      "tran_id": "Transaction ID if visible",
+      "merchant_id": "Merchant ID if visible"
+    },
+    "transaction_details": {
+      "date": "Date if visible",
+      "time": "Time if visible",
+      "store_number": "Store number if visible",
+      "terminal_number": "Terminal number if visible",
+      "transaction_number": "Transaction number if visible",
+      "operator_number": "Operator number if visible",
+      "customer_name": "Customer name if visible",
+      "total_items_sold": "Number of items if visible",
+      "instant_savings": "Savings amount if visible"
+    }
+  },
+  "objects": ["List of objects visible in the image"],
+  "people": ["List of people visible in the image"],
+  "colors": ["List of dominant colors in the image"],
+  "shapes": ["List of shapes visible in the image"],
+  "visual_elements": ["List of visual elements like text, barcode, etc."],
+  "other_details": {
+    "date_of_purchase": "Date if visible",
+    "time_of_purchase": "Time if visible",
+    "payment_type": "Payment type if visible",
+    "total_items": "Total number of items if visible"
+  }
+}
+
+IMPORTANT: Follow this EXACT structure. Do not deviate from this format.
+If information is not available, use appropriate default values or empty strings.
+"""
+# Encoded once for cache-key hashing
+DEFAULT_RECEIPT_PROMPT_BYTES = DEFAULT_RECEIPT_PROMPT.encode()
+
+
+# ISO-BMFF brands that mark a HEIC/HEIF still image
+_HEIC_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis'}
+_HEIF_BRANDS = {b'mif1', b'msf1'}
+
+# Formats Gemini accepts as inline image data; anything else is re-encoded to JPEG
+GEMINI_IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/heic', 'image/heif'}
+
+
+class _RateLimiter:
+    """Token bucket on the monotonic clock that keeps calls under a tokens-per-minute quota."""
+
+    def __init__(self, tokens_per_min: int):
+        self.capacity = tokens_per_min
+        self.rate = tokens_per_min / 60.0
+        self.tokens = float(tokens_per_min)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Take tokens from the bucket and return how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(tokens, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens: int) -> None:
+        """Block until tokens may be spent without exceeding the quota."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _sniff_mime_type(image_data: bytes) -> Optional[str]:
+    """Identify an image from its magic bytes; None for unrecognized data."""
+    head = image_data[:12]
+    if head[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if head[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head[4:8] == b'ftyp':
+        if head[8:12] in _HEIC_BRANDS:
+            return 'image/heic'
+        if head[8:12] in _HEIF_BRANDS:
+            return 'image/heif'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:2] == b'BM':
+        return 'image/bmp'
+    return None
+
+
+def _downscale_image(img: Image.Image, max_dim: int, quality: int, force: bool = False) -> Optional[bytes]:
+    """
+    Re-encode an opened image as JPEG with its long edge capped at max_dim.
+
+    Returns None when the image already fits and force is False, so small
+    images are sent untouched.
+    """
+    if not force and max(img.size) <= max_dim:
+        return None
+    # Apply the EXIF rotation before the metadata is dropped by re-encoding
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    buf = io.BytesIO()
+    img.save(buf, 'JPEG', quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def _compact_result(result: Dict[str, Any]) -> str:
+    """
+    Serialize a result for the crew without whitespace.
+
+    The raw_response copies are left out; they stay in the saved file only.
+    """
+    compact = dict(result)
+    for key in ("json_data", "metadata"):
+        section = compact.get(key)
+        if isinstance(section, dict) and "raw_response" in section:
+            compact[key] = {k: v for k, v in section.items() if k != "raw_response"}
+    return orjson.dumps(compact, option=_ORJSON_COMPACT_OPTIONS).decode()
+
+
+def _response_cache_key(prompt: str, image_data: bytes, config: Dict[str, Any]) -> str:
+    """Content hash of everything that determines a Gemini response for an image."""
+    if prompt is DEFAULT_RECEIPT_PROMPT:
+        prompt_bytes = DEFAULT_RECEIPT_PROMPT_BYTES
+    else:
+        prompt_bytes = prompt.encode()
+    h = _cache_hash()
+    h.update(MODEL_NAME.encode())
+    h.update(b'\0')
+    # Generation and downscale settings change what Gemini sees and returns
+    h.update(
+        f"{config['max_tokens']}:{config['temperature']}:"
+        f"{config['max_image_dim']}:{config['jpeg_quality']}".encode()
+    )
+    h.update(b'\0')
+    h.update(prompt_bytes)
+    h.update(b'\0')
+    h.update(image_data)
+    return h.hexdigest()
+
+
+def _read_cached_response(cache_path: str) -> Optional[str]:
+    """Return the cached response text, or None on a miss or unreadable entry."""
+    try:
+        with open(cache_path, 'rb') as f:
+            return orjson.loads(f.read())["response_text"]
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+def _write_cached_response(cache_path: str, response_text: str) -> None:
+    """Atomically store a response text so readers never see a partial entry."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps({"model": MODEL_NAME, "response_text": response_text}))
+    os.replace(tmp_path, cache_path)
 
 
 class ImageToJSONToolInput(BaseModel):
@@ -29,74 +247,171 @@ class ImageToJSONTool(BaseTool):
         "Useful for processing receipts, documents, photos, and any visual content that needs to be converted to structured data."
     )
     args_schema: Type[BaseModel] = ImageToJSONToolInput
+    # Dict shared with the other tools of the crew and reset for every kickoff:
+    # "run_id" names the default output file so the inventory step of the same
+    # run can find it, and the latest result is stored under "image_analysis"
+    # for InventoryCreatorTool. Typed Any so pydantic keeps the shared dict
+    # instead of copying it
+    run_state: Any = None
 
-    def __init__(self):
-        super().__init__()
-        # Initialize model lazily to avoid issues during crew initialization
-        self._model = None
-        self._config = None
+    # Model, config and prompt caches are shared by all instances, since crews
+    # create a new tool per agent. They are initialized lazily to avoid issues
+    # during crew initialization.
+    _shared_model: ClassVar[Optional[genai.GenerativeModel]] = None
+    _shared_config: ClassVar[Optional[Dict[str, Any]]] = None
+    # Prompt hash -> (model bound to cached prompt or None, expiry on monotonic clock)
+    _cached_models: ClassVar[Dict[str, Tuple[Any, float]]] = {}
+    # Prompt hash -> lock held while that prompt's context cache is created
+    _cached_model_locks: ClassVar[Dict[str, threading.Lock]] = {}
+    _init_lock: ClassVar[threading.Lock] = threading.Lock()
+    # Shared so every instance draws from the same Gemini quota
+    _rate_limiter: ClassVar[Optional[_RateLimiter]] = None
 
-    def _get_config(self):
+    @classmethod
+    def _get_config(cls):
         """Get or initialize configuration from environment."""
-        if self._config is None:
-            self._config = {
-                'max_tokens': int(os.getenv('MAX_TOKENS', '8192')),  # Increased default
-                'temperature': float(os.getenv('TEMPERATURE', '0.1')),
-                'output_dir': os.getenv('OUTPUT_DIR', './outputs')
-            }
-            # Create output directory if it doesn't exist
-            os.makedirs(self._config['output_dir'], exist_ok=True)
-        return self._config
+        with cls._init_lock:
+            if cls._shared_config is None:
+                config = {
+                    'max_tokens': int(os.getenv('MAX_TOKENS', '8192')),  # Increased default
+                    'temperature': float(os.getenv('TEMPERATURE', '0.1')),
+                    'output_dir': os.getenv('OUTPUT_DIR', './outputs'),
+                    'max_image_dim': int(os.getenv('MAX_IMAGE_DIM', '1600')),
+                    'jpeg_quality': int(os.getenv('JPEG_QUALITY', '85'))
+                }
+                # Create output directory if it doesn't exist
+                os.makedirs(config['output_dir'], exist_ok=True)
+                cls._shared_config = config
+            return cls._shared_config
 
-    def _get_model(self):
+    @classmethod
+    def _get_model(cls):
         """Get or initialize the Gemini model."""
-        if self._model is None:
-            api_key = os.getenv('GOOGLE_AI_API_KEY')
-            if not api_key or api_key == 'your_google_ai_api_key_here':
-                raise ValueError(
-                    "GOOGLE_AI_API_KEY environment variable not set or invalid. "
-                    "Please set it in your .env file or environment. "
-                    "See env_template.txt for reference."
-                )
+        with cls._init_lock:
+            if cls._shared_model is None:
+                api_key = os.getenv('GOOGLE_AI_API_KEY')
+                if not api_key or api_key == 'your_google_ai_api_key_here':
+                    raise ValueError(
+                        "GOOGLE_AI_API_KEY environment variable not set or invalid. "
+                        "Please set it in your .env file or environment. "
+                        "See env_template.txt for reference."
+                    )
+                
+                genai.configure(api_key=api_key)
+                cls._shared_model = genai.GenerativeModel(MODEL_NAME)
             
-            genai.configure(api_key=api_key)
-            self._model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        return self._model
+            return cls._shared_model
 
-    def _generate_unique_filename(self, base_path: str) -> str:
-        """Generate a unique filename to avoid overwriting existing files."""
-        path = Path(base_path)
+    @classmethod
+    def _get_rate_limiter(cls):
+        """Get or initialize the limiter for the GEMINI_TPM tokens-per-minute quota."""
+        with cls._init_lock:
+            if cls._rate_limiter is None:
+                cls._rate_limiter = _RateLimiter(int(os.getenv('GEMINI_TPM', '2000000')))
+            return cls._rate_limiter
+
+    @classmethod
+    def _get_cached_model(cls, prompt: str):
+        """
+        Get a model whose Gemini context cache holds the prompt.
+
+        The static prompt is then not re-sent and re-tokenized on every call.
+        Returns None when the prompt can't be cached (it is below Gemini's
+        CONTEXT_CACHE_MIN_TOKENS minimum, or the cache couldn't be created), in
+        which case the prompt is sent inline.
+        """
+        if len(prompt) < CONTEXT_CACHE_MIN_CHARS:
+            return None
+
+        key = hashlib.sha256(prompt.encode()).hexdigest()
+        with cls._init_lock:
+            cached = cls._cached_models.get(key)
+            key_lock = cls._cached_model_locks.setdefault(key, threading.Lock())
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+
+        # Only one thread counts tokens and creates the cache for a prompt;
+        # the others wait and reuse its result, so no duplicate caches are billed
+        with key_lock:
+            with cls._init_lock:
+                cached = cls._cached_models.get(key)
+            if cached is not None and time.monotonic() < cached[1]:
+                return cached[0]
+            return cls._create_cached_model(prompt, key)
+
+    @classmethod
+    def _create_cached_model(cls, prompt: str, key: str):
+        """Create the context cache for a prompt and record the outcome. Caller holds the prompt's lock."""
+        base_model = cls._get_model()  # Also ensures the API key is configured
+        model = None
+        # Refresh a minute before the cache expires on the server
+        expiry = time.monotonic() + CONTEXT_CACHE_TTL.total_seconds() - 60
+        try:
+            token_count = base_model.count_tokens(prompt).total_tokens
+        except Exception as e:
+            print(f"WARNING: Could not count prompt tokens, not caching the prompt: {e}", file=sys.stderr)
+            token_count = None
+
+        if token_count is not None and token_count < CONTEXT_CACHE_MIN_TOKENS:
+            # Too small for Gemini's context cache; this won't change, so don't ask again
+            expiry = float('inf')
+        elif token_count is not None:
+            try:
+                cache = genai.caching.CachedContent.create(
+                    model=f'models/{MODEL_NAME}',
+                    display_name=f'image_to_json_{key[:16]}',
+                    system_instruction=prompt,
+                    ttl=CONTEXT_CACHE_TTL
+                )
+                model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+            except Exception as e:
+                print(f"WARNING: Could not create Gemini context cache: {e}", file=sys.stderr)
+
+        with cls._init_lock:
+            cls._cached_models[key] = (model, expiry)
+        return model
+
+    def _generate_unique_filename(self, base_path: str) -> Tuple[str, int]:
+        """
+        Create a new file that doesn't overwrite an existing one.
+
+        The file is created with O_EXCL, so the kernel arbitrates between
+        concurrent runs without a stat per candidate name.
+
+        Returns:
+            The path of the created file and a file descriptor open for writing
+        """
+        flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
         
-        # If file doesn't exist, return original path
-        if not path.exists():
-            return base_path
+        # Use the original path if it's free
+        try:
+            return base_path, os.open(base_path, flags, 0o644)
+        except FileExistsError:
+            pass
         
         # Extract components
+        path = Path(base_path)
         stem = path.stem
         suffix = path.suffix
         parent = path.parent
         
-        # Generate timestamp
+        # Otherwise add a timestamp and a random suffix until a name is free
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Create unique filename
-        unique_filename = f"{stem}_{timestamp}{suffix}"
-        unique_path = parent / unique_filename
-        
-        # If still exists (very unlikely), add counter
-        counter = 1
-        while unique_path.exists():
-            unique_filename = f"{stem}_{timestamp}_{counter}{suffix}"
-            unique_path = parent / unique_filename
-            counter += 1
-        
-        return str(unique_path)
+        while True:
+            unique_path = str(parent / f"{stem}_{timestamp}_{secrets.token_hex(3)}{suffix}")
+            try:
+                return unique_path, os.open(unique_path, flags, 0o644)
+            except FileExistsError:
+                continue
 
     def _run(self, image_path: str, custom_prompt: Optional[str] = None, output_path: Optional[str] = None) -> str:
         """
         Convert image to JSON using Gemini 2.5 Flash.
 
+        Uses the synchronous Gemini client: the async client is bound to the
+        event loop it was created on, so it can't be shared across calls that
+        each run on their own loop.
+
         Args:
             image_path: Path to the image file
             custom_prompt: Custom prompt for the conversion (optional)
@@ -110,131 +425,142 @@ class ImageToJSONTool(BaseTool):
             if not os.path.exists(image_path):
                 return f"Error: Image file not found at {image_path}"
             
-            # Validate image file
-            try:
-                with Image.open(image_path) as img:
-                    img.verify()
-            except Exception as e:
-                return f"Error: Invalid image file - {str(e)}"
+            # Read the image once; the bytes are sent to Gemini as an inline blob
+            with open(image_path, 'rb') as f:
+                image_data = f.read()
             
-            # Default prompt if none provided
-            if custom_prompt is None:
-                prompt = """
-                Analyze this image and convert it to a structured JSON format following this EXACT structure:
-                
-                {
-                  "image_description": "Brief description of what you see in the image",
-                  "text": {
-                    "store_information": "Store name, address, phone if visible",
-                    "member_information": "Member details if visible",
-                    "items_purchased": [
-                      {"item": "Item name", "quantity": 1, "price": 0.00},
-                      {"item": "Item name", "quantity": 1, "price": 0.00}
-                    ],
-                    "totals": {
-                      "subtotal": 0.00,
-                      "tax": 0.00,
-                      "total": 0.00
-                    },
-                    "payment_information": {
-                      "aid": "Payment aid if visible",
-                      "seq": "Sequence number if visible",
-                      "app": "App number if visible",
-                      "tran_id": "Transaction ID if visible",
-                      "merchant_id": "Merchant ID if visible"
-                    },
-                    "transaction_details": {
-                      "date": "Date if visible",
-                      "time": "Time if visible",
-                      "store_number": "Store number if visible",
-                      "terminal_number": "Terminal number if visible",
-                      "transaction_number": "Transaction number if visible",
-                      "operator_number": "Operator number if visible",
-                      "customer_name": "Customer name if visible",
-                      "total_items_sold": "Number of items if visible",
-                      "instant_savings": "Savings amount if visible"
-                    }
-                  },
-                  "objects": ["List of objects visible in the image"],
-                  "people": ["List of people visible in the image"],
-                  "colors": ["List of dominant colors in the image"],
-                  "shapes": ["List of shapes visible in the image"],
-                  "visual_elements": ["List of visual elements like text, barcode, etc."],
-                  "other_details": {
-                    "date_of_purchase": "Date if visible",
-                    "time_of_purchase": "Time if visible",
-                    "payment_type": "Payment type if visible",
-                    "total_items": "Total number of items if visible"
-                  }
-                }
-                
-                IMPORTANT: Follow this EXACT structure. Do not deviate from this format.
-                If information is not available, use appropriate default values or empty strings.
-                """
-            else:
-                prompt = custom_prompt
+            # Reject anything that isn't a known image format from its magic bytes
+            mime_type = _sniff_mime_type(image_data)
+            if mime_type is None:
+                return "Error: Invalid image file - unrecognized image format"
             
-            # Load and process the image
-            image = Image.open(image_path)
+            # Default prompt if none provided
+            prompt = custom_prompt or DEFAULT_RECEIPT_PROMPT
             
-            # Get the model and config (initializes if needed)
-            model = self._get_model()
             config = self._get_config()
             
-            # Generate content using Gemini with environment-configured settings
-            response = model.generate_content([
-                prompt,
-                image
-            ], generation_config=genai.types.GenerationConfig(
-                max_output_tokens=config['max_tokens'],
-                temperature=config['temperature']
-            ))
+            # Re-processing the same image with the same prompt, model and
+            # settings is answered from the on-disk response cache without
+            # calling Gemini
+            cache_key = _response_cache_key(prompt, image_data, config)
+            cache_path = os.path.join(config['output_dir'], '.cache', f'{cache_key}.json')
+            response_text = _read_cached_response(cache_path)
+            from_cache = response_text is not None
+            usage = None
             
-            # Parse the response
-            response_text = response.text.strip()
-            
-            # Try to extract JSON from the response
+            # Open the image once: the lazy open validates the header and gives
+            # the size, and on a cache miss the same handle feeds the downscale.
+            # Large photos are downscaled, which cuts upload size and the number
+            # of vision tiles billed; formats Gemini can't take are re-encoded
+            resized = None
             try:
-                # Look for JSON in the response
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
+                with Image.open(io.BytesIO(image_data)) as img:
+                    image_size = img.size
+                    if response_text is None:
+                        resized = _downscale_image(
+                            img, config['max_image_dim'], config['jpeg_quality'],
+                            force=mime_type not in GEMINI_IMAGE_TYPES
+                        )
+            except Exception as e:
+                # Pillow needs a plugin for HEIC/HEIF, but Gemini reads them natively
+                if mime_type not in ('image/heic', 'image/heif'):
+                    return f"Error: Invalid image file - {str(e)}"
+                image_size = None
+            
+            if response_text is None:
+                # Inline image blob
+                if resized is not None:
+                    image = {'mime_type': 'image/jpeg', 'data': resized}
+                else:
+                    image = {'mime_type': mime_type, 'data': image_data}
                 
-                if json_start != -1 and json_end > json_start:
-                    json_str = response_text[json_start:json_end]
-                    parsed_json = json.loads(json_str)
+                # Get the model (initializes if needed); prefer the
+                # context-cached prompt so only the image is sent
+                model = self._get_cached_model(prompt)
+                if model is not None:
+                    contents = [image]
                 else:
-                    # If no JSON found, wrap the response in a JSON structure
+                    model = self._get_model()
+                    contents = [prompt, image]
+                
+                # Generate content using Gemini with environment-configured
+                # settings. Calls wait for quota in the shared token bucket,
+                # and a 429 is retried with exponential backoff and jitter
+                generation_config = genai.types.GenerationConfig(
+                    max_output_tokens=config['max_tokens'],
+                    temperature=config['temperature']
+                )
+                estimated_tokens = config['max_tokens'] + len(prompt) // 4
+                rate_limiter = self._get_rate_limiter()
+                for attempt in range(GEMINI_MAX_ATTEMPTS):
+                    rate_limiter.acquire(estimated_tokens)
+                    try:
+                        response = model.generate_content(contents, generation_config=generation_config)
+                        break
+                    except ResourceExhausted:
+                        if attempt == GEMINI_MAX_ATTEMPTS - 1:
+                            raise
+                        time.sleep(min(2 ** attempt, 30) + random.random())
+                
+                # Parse the response
+                response_text = response.text.strip()
+                usage = getattr(response, 'usage_metadata', None)
+            
+            # Try to extract JSON from the response: the span from the first '{' to the last '}'
+            match = _JSON_RE.search(response_text.encode())
+            if match:
+                try:
+                    parsed_json = orjson.loads(match.group(0))
+                    # Only well-formed responses are cached, so a truncated or
+                    # malformed answer is retried next time instead of replayed
+                    if not from_cache:
+                        try:
+                            _write_cached_response(cache_path, response_text)
+                        except OSError:
+                            pass  # A failed cache write only costs a future API call
+                except orjson.JSONDecodeError:
+                    # If JSON parsing fails, wrap in a structure
                     parsed_json = {
                         "description": response_text,
-                        "raw_response": response_text
+                        "raw_response": response_text,
+                        "parse_error": "Response could not be parsed as JSON"
                     }
-                
-            except json.JSONDecodeError:
-                # If JSON parsing fails, wrap in a structure
+            else:
+                # If no JSON found, wrap the response in a JSON structure
                 parsed_json = {
                     "description": response_text,
-                    "raw_response": response_text,
-                    "parse_error": "Response could not be parsed as JSON"
+                    "raw_response": response_text
                 }
             
+            # Token count as reported by Gemini; cached responses and older
+            # clients without usage metadata get a ~4 chars/token estimate
+            if usage is not None:
+                tokens_used = usage.total_token_count
+            else:
+                tokens_used = len(response_text) // 4
+            
             # Create result structure
             result = {
                 "success": True,
                 "json_data": parsed_json,
                 "metadata": {
                     "image_path": image_path,
-                    "image_size": image.size,
-                    "model": "gemini-2.5-flash",
-                    "tokens_used": len(response_text.split()),
+                    "image_size": image_size,
+                    "model": MODEL_NAME,
+                    "tokens_used": tokens_used,
                     "raw_response": response_text
                 }
             }
             
+            # Hand the result to the inventory step in memory
+            if self.run_state is not None:
+                self.run_state["image_analysis"] = result
+            
             # Save to file - generate unique filename if output_path is not provided
             if not output_path:
-                # Generate a unique filename with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_path = f"image_analysis_{timestamp}.json"
+                # Name the file after the crew run, or a timestamp outside a crew
+                run_id = (self.run_state or {}).get("run_id") or datetime.now().strftime("%Y%m%d_%H%M%S")
+                output_path = f"image_analysis_{run_id}.json"
             
             try:
                 # Use configured output directory if path is relative
@@ -242,17 +568,28 @@ class ImageToJSONTool(BaseTool):
                     output_path = os.path.join(config['output_dir'], output_path)
                 
                 # Generate unique filename to avoid overwriting
-                unique_output_path = self._generate_unique_filename(output_path)
-                
-                with open(unique_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, indent=2, ensure_ascii=False)
+                unique_output_path, fd = self._generate_unique_filename(output_path)
                 result["output_file"] = unique_output_path
                 result["original_path"] = output_path
                 result["unique_filename"] = True
+                
+                # Write through the descriptor that reserved the name; a
+                # failed write removes the file and is reported as save_error
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(orjson.dumps(result, option=_ORJSON_OPTIONS))
+                        f.flush()
+                        os.fsync(f.fileno())
+                except Exception:
+                    os.unlink(unique_output_path)
+                    raise
+                return _compact_result(result)
             except Exception as e:
+                for key in ("output_file", "original_path", "unique_filename"):
+                    result.pop(key, None)
                 result["save_error"] = str(e)
             
-            return json.dumps(result, indent=2)
+            return _compact_result(result)
             
         except Exception as e:
             error_result = {
@@ -260,7 +597,16 @@ class ImageToJSONTool(BaseTool):
                 "error": str(e),
                 "metadata": {
                     "image_path": image_path,
-                    "model": "gemini-2.5-flash"
+                    "model": MODEL_NAME
                 }
             }
-            return json.dumps(error_result, indent=2)
+            return _compact_result(error_result)
+
+    async def _arun(self, image_path: str, custom_prompt: Optional[str] = None, output_path: Optional[str] = None) -> str:
+        """
+        Convert image to JSON without blocking the event loop.
+
+        The synchronous conversion runs in a worker thread, so no async Gemini
+        client is ever tied to the caller's loop.
+        """
+        return await asyncio.to_thread(self._run, image_path, custom_prompt, output_path)
@@ -1,28 +1,76 @@
 """
 Inventory Creator Tool for SmartShop Crew
 
-This tool reads the latest image_analysis_*.json file from the outputs directory
-and creates a structured inventory JSON file.
+This tool takes the image analysis of the current crew run, in memory or from
+the latest image_analysis_*.json file in the outputs directory, and creates a
+structured inventory JSON file.
 """
 
 import json
 import os
-import glob
+import secrets
+import orjson
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 from crewai.tools import BaseTool
 
+# Results are parsed by agents, not read by people, so they are returned compact
+_COMPACT = (',', ':')
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _read_analysis_fields(path, *prefixes):
+    """
+    Read selected dotted paths (e.g. "json_data") from an image analysis file.
+    
+    With ijson available each path is stream-parsed, so parsing stops as soon
+    as the value is complete and the large metadata.raw_response string is
+    never decoded unless it is asked for. Without ijson the file is parsed once
+    with orjson. Missing paths map to None.
+    """
+    fields = {}
+    with open(path, 'rb') as f:
+        if ijson is None:
+            data = orjson.loads(f.read())
+            for prefix in prefixes:
+                value = data
+                for key in prefix.split('.'):
+                    value = value.get(key) if isinstance(value, dict) else None
+                fields[prefix] = value
+            return fields
+        
+        for prefix in prefixes:
+            f.seek(0)
+            fields[prefix] = next(ijson.items(f, prefix, use_float=True), None)
+    return fields
+
 
 class InventoryCreatorTool(BaseTool):
     """Tool to create inventory from image analysis data."""
     
     name: str = "inventory_creator"
     description: str = """
-    Creates an inventory JSON file from the latest image_analysis_*.json file.
-    Reads the most recent image analysis file from the outputs directory and 
-    extracts items, quantities, prices, and date to create a structured inventory.
+    Creates an inventory JSON file from the image analysis of the previous step.
+    Picks up the image_to_json_converter result automatically (falling back to the
+    most recent image_analysis_*.json file in the outputs directory) and extracts
+    items, quantities, prices, and date to create a structured inventory.
     """
+    # Dict shared with the other tools of the crew and reset for every kickoff:
+    # "run_id" limits the search to that run's image analysis and names the
+    # inventory file, and ImageToJSONTool leaves its result under
+    # "image_analysis". Typed Any so pydantic keeps the shared dict instead of
+    # copying it
+    run_state: Any = None
+    
+    @property
+    def run_id(self) -> Optional[str]:
+        """Id of the current crew run, or None outside a crew."""
+        return self.run_state.get("run_id") if self.run_state is not None else None
     
     def _run(
         self, 
@@ -30,7 +78,10 @@ class InventoryCreatorTool(BaseTool):
         inventory_filename: Optional[str] = None
     ) -> str:
         """
-        Create inventory from the latest image analysis file.
+        Create inventory from this run's image analysis.
+        
+        The result ImageToJSONTool left in run_state is used directly; only
+        without one is the latest image analysis file read from output_dir.
         
         Args:
             output_dir: Directory containing image analysis files
@@ -39,37 +90,51 @@ class InventoryCreatorTool(BaseTool):
         Returns:
             JSON string with inventory data
         """
+        image_data = self.run_state.get("image_analysis") if self.run_state is not None else None
+        if image_data is not None:
+            return self._run_from_dict(image_data, output_dir, inventory_filename)
+        
         try:
-            # Find the latest image_analysis_*.json file
-            pattern = os.path.join(output_dir, "image_analysis_*.json")
-            image_files = glob.glob(pattern)
+            # Find the most recent image_analysis_*.json file of this run in a
+            # single directory pass, using the stat cached on each DirEntry
+            prefix = f"image_analysis_{self.run_id}" if self.run_id else "image_analysis_"
+            latest_file = None
+            latest_ctime = -1.0
+            with os.scandir(output_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith(prefix) and name.endswith(".json"):
+                        ctime = entry.stat().st_ctime
+                        if ctime > latest_ctime:
+                            latest_ctime = ctime
+                            latest_file = entry.path
             
-            if not image_files:
+            if latest_file is None:
                 return json.dumps({
                     "success": False,
-                    "error": f"No image_analysis_*.json files found in {output_dir}"
-                }, indent=2)
-            
-            # Get the most recent file
-            latest_file = max(image_files, key=os.path.getctime)
+                    "error": f"No {prefix}*.json files found in {output_dir}"
+                }, separators=_COMPACT, ensure_ascii=False)
             
-            # Read the image analysis data
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                image_data = json.load(f)
+            # Read only the fields we need from the image analysis data
+            analysis = _read_analysis_fields(latest_file, "success", "json_data")
             
-            if not image_data.get("success", False):
+            if not analysis["success"]:
                 return json.dumps({
                     "success": False,
                     "error": "Image analysis data indicates failure"
-                }, indent=2)
+                }, separators=_COMPACT, ensure_ascii=False)
             
             # Extract items from the image analysis
             # Handle nested json_data structure
-            json_data = image_data.get("json_data", {})
+            json_data = analysis["json_data"] or {}
             
-            # Strategy 1: Try to parse from raw_response in metadata first
-            if "metadata" in image_data and "raw_response" in image_data["metadata"]:
-                raw_response = image_data["metadata"]["raw_response"]
+            # Strategy 1: Fall back to parsing raw_response from metadata when
+            # json_data does not already hold the receipt items
+            has_items = isinstance(json_data.get("text"), dict) and "items_purchased" in json_data["text"]
+            raw_response = None
+            if not has_items:
+                raw_response = _read_analysis_fields(latest_file, "metadata.raw_response")["metadata.raw_response"]
+            if isinstance(raw_response, str):
                 if raw_response.startswith("```json"):
                     raw_response = raw_response.replace("```json\n", "").replace("```", "").strip()
                 
@@ -80,85 +145,44 @@ class InventoryCreatorTool(BaseTool):
                 except json.JSONDecodeError:
                     pass  # Try next strategy
             
-            # Strategy 2: Try to parse from description or raw_response in json_data
-            for field in ["raw_response", "description"]:
-                if field in json_data and isinstance(json_data[field], str):
-                    content = json_data[field]
-                    # Remove markdown code block markers
-                    if content.startswith("```json"):
-                        content = content.replace("```json\n", "").replace("```", "").strip()
-                    
-                    try:
-                        parsed_json = json.loads(content)
-                        if "text" in parsed_json and "items_purchased" in parsed_json["text"]:
-                            json_data = parsed_json
-                            break
-                    except json.JSONDecodeError:
-                        continue  # Try next field
-
-            # Strategy 3: Check if there's a nested json_data (from tool output)
-            if "json_data" in json_data:
-                json_data = json_data.get("json_data", {})
-
-            # Extract the data we need
-            text_data = json_data.get("text", {})
-            items_purchased = text_data.get("items_purchased", [])
-            totals = text_data.get("totals", {})
-            transaction_details = text_data.get("transaction_details", {})
-            
-            # If still no items found, log the structure for debugging
-            if not items_purchased:
-                import sys
-                print(f"WARNING: No items found in inventory. JSON structure keys: {list(json_data.keys())}", file=sys.stderr)
-                print(f"text_data keys: {list(text_data.keys())}", file=sys.stderr)
+            return self._build_inventory(json_data, output_dir, inventory_filename, latest_file)
             
-            # Create inventory structure
-            inventory = {
-                "inventory": {
-                    "date": transaction_details.get("date", datetime.now().strftime("%Y-%m-%d")),
-                    "items": [],
-                    "total_items": len(items_purchased),
-                    "total_value": totals.get("total_amount", totals.get("total", 0.0)),
-                    "subtotal": totals.get("subtotal", 0.0),
-                    "tax": totals.get("tax", 0.0)
-                }
+        except Exception as e:
+            error_result = {
+                "success": False,
+                "error": str(e),
+                "output_dir": output_dir
             }
+            return json.dumps(error_result, separators=_COMPACT, ensure_ascii=False)
+
+    def _run_from_dict(
+        self,
+        image_data: dict,
+        output_dir: str = "./outputs",
+        inventory_filename: Optional[str] = None
+    ) -> str:
+        """
+        Create inventory from image analysis data already in memory.
+        
+        Skips the directory scan and the read and parse of the analysis file.
+        
+        Args:
+            image_data: ImageToJSONTool result, or its json_data
+            output_dir: Directory for the inventory file
+            inventory_filename: Optional custom filename for inventory
             
-            # Process each item
-            for item in items_purchased:
-                # Handle different field names: "item", "item_name", or "name"
-                item_name = item.get("item") or item.get("item_name") or item.get("name") or "Unknown Item"
-                inventory_item = {
-                    "item": item_name,
-                    "quantity": item.get("quantity", 1),
-                    "price": item.get("price", 0.0)
-                }
-                inventory["inventory"]["items"].append(inventory_item)
-            
-            # Generate inventory filename if not provided
-            if not inventory_filename:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                inventory_filename = f"inventory_{timestamp}.json"
-            
-            # Ensure output directory exists
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # Save inventory file
-            inventory_path = os.path.join(output_dir, inventory_filename)
-            with open(inventory_path, 'w', encoding='utf-8') as f:
-                json.dump(inventory, f, indent=2, ensure_ascii=False)
-            
-            # Return success result
-            result = {
-                "success": True,
-                "inventory_data": inventory,
-                "source_file": latest_file,
-                "output_file": inventory_path,
-                "items_count": len(items_purchased),
-                "total_value": totals.get("total", 0.0)
-            }
+        Returns:
+            JSON string with inventory data
+        """
+        try:
+            if not image_data.get("success", True):
+                return json.dumps({
+                    "success": False,
+                    "error": "Image analysis data indicates failure"
+                }, separators=_COMPACT, ensure_ascii=False)
             
-            return json.dumps(result, indent=2)
+            json_data = image_data.get("json_data", image_data) or {}
+            return self._build_inventory(json_data, output_dir, inventory_filename, image_data.get("output_file"))
             
         except Exception as e:
             error_result = {
@@ -166,4 +190,108 @@ class InventoryCreatorTool(BaseTool):
                 "error": str(e),
                 "output_dir": output_dir
             }
-            return json.dumps(error_result, indent=2)
+            return json.dumps(error_result, separators=_COMPACT, ensure_ascii=False)
+
+    def _build_inventory(
+        self,
+        json_data: dict,
+        output_dir: str,
+        inventory_filename: Optional[str],
+        source_file: Optional[str]
+    ) -> str:
+        """Extract receipt items from image analysis data and save the inventory file."""
+        # Strategy 2: Try to parse from description or raw_response in json_data
+        for field in ["raw_response", "description"]:
+            if field in json_data and isinstance(json_data[field], str):
+                content = json_data[field]
+                # Remove markdown code block markers
+                if content.startswith("```json"):
+                    content = content.replace("```json\n", "").replace("```", "").strip()
+        
+                try:
+                    parsed_json = json.loads(content)
+                    if "text" in parsed_json and "items_purchased" in parsed_json["text"]:
+                        json_data = parsed_json
+                        break
+                except json.JSONDecodeError:
+                    continue  # Try next field
+        
+        # Strategy 3: Check if there's a nested json_data (from tool output)
+        if "json_data" in json_data:
+            json_data = json_data.get("json_data", {})
+        
+        # Extract the data we need
+        text_data = json_data.get("text", {})
+        items_purchased = text_data.get("items_purchased", [])
+        totals = text_data.get("totals", {})
+        transaction_details = text_data.get("transaction_details", {})
+        
+        # If still no items found, log the structure for debugging
+        if not items_purchased:
+            import sys
+            print(f"WARNING: No items found in inventory. JSON structure keys: {list(json_data.keys())}", file=sys.stderr)
+            print(f"text_data keys: {list(text_data.keys())}", file=sys.stderr)
+        
+        # Process each item
+        # Handle different field names: "item", "item_name", or "name"
+        items_list = [
+            {
+                "item": item.get("item") or item.get("item_name") or item.get("name") or "Unknown Item",
+                "quantity": item.get("quantity", 1),
+                "price": item.get("price", 0.0)
+            }
+            for item in items_purchased
+        ]
+        
+        # Create inventory structure
+        inventory_body = {
+            "date": transaction_details.get("date", datetime.now().strftime("%Y-%m-%d")),
+            "items": items_list,
+            "total_items": len(items_purchased),
+            "total_value": totals.get("total_amount", totals.get("total", 0.0)),
+            "subtotal": totals.get("subtotal", 0.0),
+            "tax": totals.get("tax", 0.0)
+        }
+        inventory = {"inventory": inventory_body}
+        
+        # Generate inventory filename if not provided
+        if not inventory_filename:
+            # Outside a crew run, a random suffix keeps same-second runs apart
+            run_id = self.run_id or f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{secrets.token_hex(3)}'
+            inventory_filename = f"inventory_{run_id}.json"
+        
+        # Ensure output directory exists
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Save inventory file atomically, so readers see either the old file
+        # or the complete new one, never a partial write
+        inventory_path = os.path.join(output_dir, inventory_filename)
+        # A unique temp file per write, so concurrent runs never share one.
+        # Opened normally (not via mkstemp) so the file gets the usual
+        # umask-based mode instead of 0600
+        tmp_path = f"{inventory_path}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+        f = open(tmp_path, 'xb')
+        try:
+            with f:
+                f.write(orjson.dumps(inventory, option=orjson.OPT_INDENT_2))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, inventory_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        
+        # Return success result
+        result = {
+            "success": True,
+            "inventory_data": inventory,
+            "source_file": source_file,
+            "output_file": inventory_path,
+            "items_count": len(items_purchased),
+            "total_value": totals.get("total", 0.0)
+        }
+        
+        return json.dumps(result, separators=_COMPACT, ensure_ascii=False)
@@ -11,18 +11,14 @@ from pathlib import Path
 # Add the src directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+# Importing smart_shop.crew also loads the .env file, once per process
 from smart_shop.crew import SmartShop
 
 
-
 def test_crew_kickoff():
     """Test the crew kickoff with image processing."""
     print("\nTesting Crew Kickoff with Image Processing...")
     
-    # Load environment variables
-    from dotenv import load_dotenv
-    load_dotenv()
-    
     # Check if we have the required environment variable
     api_key = os.getenv('GOOGLE_AI_API_KEY')
     if not api_key or api_key == 'your_google_ai_api_key_here':
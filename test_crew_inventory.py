@@ -11,30 +11,44 @@ This script:
 
 import sys
 import os
-import json
+import asyncio
+import functools
+import itertools
+import traceback
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
 
 # Add the src directory to the path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+# Importing smart_shop.crew also loads the .env file, once per process
 from smart_shop.crew import SmartShop
 
-# Load environment variables
-load_dotenv()
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+@functools.lru_cache(maxsize=1)
+def _get_crew():
+    """Build the SmartShop crew once per process and reuse it."""
+    return SmartShop()
+
+BANNER_RULE = "=" * 80
+SECTION_RULE = "─" * 80
 
 def print_banner(text):
     """Print a formatted banner."""
-    print("\n" + "=" * 80)
-    print(f"  {text}")
-    print("=" * 80 + "\n")
+    sys.stdout.write(f"\n{BANNER_RULE}\n  {text}\n{BANNER_RULE}\n\n")
 
 def print_section(title):
     """Print a section header."""
-    print(f"\n{'─' * 80}")
-    print(f"  {title}")
-    print(f"{'─' * 80}\n")
+    sys.stdout.write(f"\n{SECTION_RULE}\n  {title}\n{SECTION_RULE}\n\n")
 
 def validate_environment():
     """Validate that required environment variables are set."""
@@ -54,13 +68,14 @@ def validate_environment():
         print("✓ Set GOOGLE_AI_API_KEY from GEMINI_API_KEY for tool compatibility")
 
     print(f"✓ GEMINI_API_KEY: {gemini_key[:10]}...{gemini_key[-4:]}")
-    print(f"✓ GOOGLE_AI_API_KEY: {os.getenv('GOOGLE_AI_API_KEY')[:10]}...{os.getenv('GOOGLE_AI_API_KEY')[-4:]}")
+    google_key = os.environ['GOOGLE_AI_API_KEY']
+    print(f"✓ GOOGLE_AI_API_KEY: {google_key[:10]}...{google_key[-4:]}")
 
     return True
 
 def find_test_image():
-    """Find a test image to process."""
-    print_section("Finding Test Image")
+    """Find all available test images to process."""
+    print_section("Finding Test Images")
 
     # List of potential test image locations
     test_images = [
@@ -69,34 +84,88 @@ def find_test_image():
         "./src/smart_shop/images/CostcoBill2.jpeg"
     ]
 
+    # List each candidate directory once and test names against it,
+    # instead of a stat per candidate path
+    dir_entries = {}
+    for directory in {os.path.dirname(path) for path in test_images}:
+        try:
+            with os.scandir(directory) as entries:
+                dir_entries[directory] = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            dir_entries[directory] = set()
+
+    found = []
     for image_path in test_images:
-        if os.path.exists(image_path):
+        if os.path.basename(image_path) in dir_entries[os.path.dirname(image_path)]:
             abs_path = os.path.abspath(image_path)
             print(f"✓ Found test image: {abs_path}")
-            return abs_path
+            found.append(abs_path)
+
+    if found:
+        return found
 
     print("❌ ERROR: No test image found!")
     print("Searched locations:")
     for path in test_images:
         print(f"  - {path}")
-    return None
+    return []
 
-def read_latest_json(output_dir, pattern):
-    """Read the latest JSON file matching the pattern."""
-    import glob
-
-    files = glob.glob(os.path.join(output_dir, pattern))
-    if not files:
+def read_json(path):
+    """Read a JSON result file; returns (data, path), or (None, None) if it doesn't exist."""
+    try:
+        with open(path, 'rb') as f:
+            return json_loads(f.read()), path
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        print(f"❌ Error reading {path}: {e}")
         return None, None
 
-    latest_file = max(files, key=os.path.getctime)
+def read_inventory_streaming(path):
+    """
+    Read an inventory file with its items as a lazy iterator.
+
+    With ijson the scalar fields are collected in one streaming pass and items
+    are parsed one at a time while they are consumed, so the whole item list is
+    never held in memory. Without ijson the file is loaded in full.
+    """
+    if ijson is None:
+        with open(path, 'rb') as f:
+            inventory_data = json_loads(f.read())
+        inventory = inventory_data.get("inventory", {})
+        inventory["items"] = iter(inventory.get("items", []))
+        return inventory_data
+
+    inventory = {}
+    with open(path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix.count('.') == 1 and prefix.startswith('inventory.') and event in ('string', 'number', 'boolean', 'null'):
+                inventory[prefix[len('inventory.'):]] = value
+
+    def iter_items():
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'inventory.items.item', use_float=True)
+
+    inventory["items"] = iter_items()
+    return {"inventory": inventory}
+
+def read_inventory(path):
+    """Stream-read an inventory file; returns (inventory_data, path), or (None, None) if it doesn't exist."""
+    if not os.path.exists(path):
+        return None, None
 
     try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            return json.load(f), latest_file
+        return read_inventory_streaming(path), path
     except Exception as e:
-        print(f"❌ Error reading {latest_file}: {e}")
-        return None, None
+        print(f"❌ Error reading {path}: {e}")
+        return None, path
+
+async def read_results(output_dir, run_id):
+    """Read the image analysis and inventory results of one crew run concurrently."""
+    return await asyncio.gather(
+        asyncio.to_thread(read_json, os.path.join(output_dir, f"image_analysis_{run_id}.json")),
+        asyncio.to_thread(read_inventory, os.path.join(output_dir, f"inventory_{run_id}.json"))
+    )
 
 def print_inventory_items(inventory_data):
     """Print inventory items in a formatted way."""
@@ -107,9 +176,11 @@ def print_inventory_items(inventory_data):
     print_section("Detected Inventory Items")
 
     inventory = inventory_data.get("inventory", {})
-    items = inventory.get("items", [])
 
-    if not items:
+    # Items may be a lazy iterator, so peek at the first one
+    items = iter(inventory.get("items", []))
+    first_item = next(items, None)
+    if first_item is None:
         print("❌ No items found in inventory")
         return
 
@@ -126,20 +197,20 @@ def print_inventory_items(inventory_data):
     print(f"{'#':<4} {'Item Name':<40} {'Qty':<8} {'Price':<10}")
     print("─" * 70)
 
-    for idx, item in enumerate(items, 1):
-        item_name = item.get('item', 'Unknown')
-        quantity = item.get('quantity', 0)
-        price = item.get('price', 0.00)
-        print(f"{idx:<4} {item_name:<40} {quantity:<8} ${price:<9.2f}")
-
-    print("─" * 70)
+    # Format every row first and write the table in one call
+    lines = [
+        f"{idx:<4} {item.get('item', 'Unknown'):<40} {item.get('quantity', 0):<8} ${item.get('price', 0.00):<9.2f}"
+        for idx, item in enumerate(itertools.chain((first_item,), items), 1)
+    ]
+    lines.append("─" * 70)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def run_crew_test(image_path):
     """Run the SmartShop crew with the given image."""
     print_banner("SmartShop CrewAI Agent Test")
 
     print(f"Test Image: {image_path}")
-    print(f"Test Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Test Time: {datetime.now().isoformat(sep=' ', timespec='seconds')}")
 
     # Prepare inputs for the crew
     inputs = {
@@ -151,7 +222,7 @@ def run_crew_test(image_path):
 
     try:
         # Initialize the crew
-        smart_shop = SmartShop()
+        smart_shop = _get_crew()
         print("✓ SmartShop crew initialized successfully")
 
         # Get the crew
@@ -173,15 +244,19 @@ def run_crew_test(image_path):
         # Read and display the results
         output_dir = os.getenv('OUTPUT_DIR', './outputs')
 
-        # Read image analysis result
-        image_data, image_file = read_latest_json(output_dir, "image_analysis_*.json")
+        # Read both result files of this run concurrently; they are named
+        # after its run id, so other runs' files are never picked up
+        (image_data, image_file), (inventory_data, inventory_file) = asyncio.run(
+            read_results(output_dir, smart_shop._run_id)
+        )
+
+        # Image analysis result
         if image_file:
             print(f"\n✓ Image Analysis File: {image_file}")
             if image_data and image_data.get('success'):
                 print("✓ Image processing successful")
 
-        # Read inventory result
-        inventory_data, inventory_file = read_latest_json(output_dir, "inventory_*.json")
+        # Inventory result
         if inventory_file:
             print(f"✓ Inventory File: {inventory_file}")
             if inventory_data:
@@ -200,25 +275,59 @@ def run_crew_test(image_path):
     except Exception as e:
         print_section("ERROR")
         print(f"❌ An error occurred: {str(e)}")
-        import traceback
         print("\nFull traceback:")
         traceback.print_exc()
         print_banner("Test Failed ✗")
         return False
 
+def run_crew_test_batch(image_paths):
+    """Run the SmartShop crew over several images concurrently."""
+    from smart_shop.batch import kickoff_many
+
+    print_banner("SmartShop CrewAI Agent Batch Test")
+
+    print(f"Test Images: {len(image_paths)}")
+    print(f"Test Time: {datetime.now().isoformat(sep=' ', timespec='seconds')}")
+
+    print_section("Running Crew Tasks")
+    print("Each image gets its own crew; the Gemini calls overlap.")
+    print("\nPlease wait, this may take a minute...\n")
+
+    results = kickoff_many(image_paths)
+
+    print_section("Batch Results")
+    failures = 0
+    for image_path in image_paths:
+        result = results.get(image_path)
+        if isinstance(result, Exception):
+            failures += 1
+            print(f"❌ {image_path}: {result}")
+        else:
+            print(f"✓ {image_path}: {str(result)[:200]}")
+
+    if failures:
+        print_banner(f"Batch Test Failed ✗ ({failures}/{len(image_paths)} images)")
+        return False
+
+    print_banner("Batch Test Completed Successfully ✓")
+    return True
+
 def main():
     """Main test function."""
     # Validate environment
     if not validate_environment():
         sys.exit(1)
 
-    # Find test image
-    image_path = find_test_image()
-    if not image_path:
+    # Find test images
+    image_paths = find_test_image()
+    if not image_paths:
         sys.exit(1)
 
-    # Run the crew test
-    success = run_crew_test(image_path)
+    # Run the crew test; --batch processes every test image concurrently
+    if "--batch" in sys.argv[1:]:
+        success = run_crew_test_batch(image_paths)
+    else:
+        success = run_crew_test(image_paths[0])
 
     sys.exit(0 if success else 1)
 